@@ -23,4 +23,4 @@ except ImportError:
     # warning was already raised
     pass
 
-from .qulacs_convert import tk_to_qulacs
+from .qulacs_convert import tk_to_qulacs, tk_to_qulacs_parametric
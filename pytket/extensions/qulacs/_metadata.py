@@ -0,0 +1,2 @@
+__extension_version__ = "0.39.0"
+__extension_name__ = "pytket-qulacs"
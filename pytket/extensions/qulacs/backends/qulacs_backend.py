@@ -15,13 +15,13 @@
 """Methods to allow tket circuits to be ran on the Qulacs simulator
 """
 
-from typing import List, Optional, Sequence, Union, Type, cast
+from typing import Dict, List, Optional, Sequence, Union, Type, cast
 from logging import warning
 from random import Random
 from uuid import uuid4
 import numpy as np
 from sympy import Expr
-from qulacs import Observable, QuantumState, DensityMatrix
+from qulacs import Observable, QuantumCircuit, QuantumState, DensityMatrix
 from pytket.backends import (
     Backend,
     CircuitNotRunError,
@@ -202,14 +202,23 @@ class QulacsBackend(Backend):
         seed = cast(Optional[int], kwargs.get("seed"))
         rng = Random(seed) if seed else None
 
+        # pytket circuits are mutable and unhashable, so converted circuits are
+        # only reused for repeated occurrences of the same object in this batch.
+        converted: Dict[int, QuantumCircuit] = {}
         handle_list = []
         for circuit, n_shots_circ in zip(circuits, n_shots_list):
             qulacs_state = self._sim(circuit.n_qubits)
             qulacs_state.set_zero_state()
-            qulacs_circ = tk_to_qulacs(
-                circuit, reverse_index=True, replace_implicit_swaps=True
-            )
-            qulacs_circ.update_quantum_state(qulacs_state)
+            qulacs_circ = converted.get(id(circuit))
+            if qulacs_circ is None:
+                qulacs_circ = tk_to_qulacs(
+                    circuit, reverse_index=True, replace_implicit_swaps=True
+                )
+                converted[id(circuit)] = qulacs_circ
+            # without gates the state stays |0...0>
+            has_gates = qulacs_circ.get_gate_count() > 0
+            if has_gates:
+                qulacs_circ.update_quantum_state(qulacs_state)
             if self._result_type == "state_vector":
                 state = qulacs_state.get_vector()  # type: ignore
             else:
@@ -222,14 +231,21 @@ class QulacsBackend(Backend):
                 # hence we need to push the measurements through the
                 # SWAPs.
                 wire_map = circuit.implicit_qubit_permutation()
-                bits2index = list(
-                    (com.bits[0], qubits.index(wire_map[com.qubits[0]]))
-                    for com in circuit
-                    if com.op.type == OpType.Measure
-                )
+                qubit_positions = {qb: i for i, qb in enumerate(qubits)}
+                bits2index = [
+                    (com.bits[0], qubit_positions[wire_map[com.qubits[0]]])
+                    for com in circuit.commands_of_type(OpType.Measure)
+                ]
                 if len(bits2index) == 0:
                     bits = circuit.bits
                     shots = OutcomeArray.from_ints([0] * n_shots_circ, len(bits))
+                elif not has_gates:
+                    bits = [bit for bit, _ in bits2index]
+                    shots = OutcomeArray.from_ints([0] * n_shots_circ, len(bits))
+                    if rng:
+                        # Draw the sampling seed anyway so that the shots of
+                        # later circuits in a seeded batch are unchanged.
+                        rng.randint(0, 2**32 - 1)
                 else:
                     bits, choose_indices = zip(*bits2index)  # type: ignore
 
@@ -263,7 +279,6 @@ class QulacsBackend(Backend):
                 }
             handle_list.append(handle)
             del qulacs_state
-            del qulacs_circ
         return handle_list
 
     def _sample_quantum_state(
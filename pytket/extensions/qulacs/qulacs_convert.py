@@ -14,10 +14,15 @@
 
 """Conversion from to tket circuits to Qulacs circuits
 """
+import math
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
 import numpy as np
-from qulacs import QuantumCircuit, gate
-from pytket.circuit import Circuit, OpType
-from pytket.passes import FlattenRegisters
+from sympy import Expr, Symbol
+from qulacs import ParametricQuantumCircuit, QuantumCircuit, gate
+from pytket.circuit import Circuit, OpType, Qubit
+from pytket.predicates import GateSetPredicate
 
 _ONE_QUBIT_GATES = {
     OpType.X: gate.X,
@@ -39,71 +44,333 @@ _TWO_QUBIT_GATES = {OpType.CX: gate.CNOT, OpType.CZ: gate.CZ, OpType.SWAP: gate.
 _IBM_GATES = {OpType.U1: gate.U1, OpType.U2: gate.U2, OpType.U3: gate.U3}
 
 
+class _GateSpec:
+    """How to add a gate of some OpType to a Qulacs circuit.
+
+    :param add_gate: QuantumCircuit method adding the gate. Calling the
+        add_*_gate methods builds the gate on the C++ side, avoiding a Python
+        gate object and the copy made by QuantumCircuit.add_gate.
+    :param n_qubits: Number of qubits the gate acts on
+    :param n_params: Number of parameters of the gate
+    :param sign: Sign applied to the parameters, which are in half-turns
+    """
+
+    __slots__ = ("add_gate", "n_qubits", "n_params", "sign")
+
+    def __init__(
+        self, add_gate: Callable[..., None], n_qubits: int, n_params: int, sign: int
+    ) -> None:
+        self.add_gate = add_gate
+        self.n_qubits = n_qubits
+        self.n_params = n_params
+        self.sign = sign
+
+
+def _add_gate_method(qulacs_gate: Any) -> Callable[..., None]:
+    """QuantumCircuit.add_*_gate method matching a qulacs.gate factory."""
+    return cast(
+        Callable[..., None], getattr(QuantumCircuit, f"add_{qulacs_gate.__name__}_gate")
+    )
+
+
+_IBM_N_PARAMS = {OpType.U1: 1, OpType.U2: 2, OpType.U3: 3}
+
+# Built from the gate dicts above, which also define the backend's gate set.
+# Rotation parameters are negated for qulacs.
+_DISPATCH: Dict[OpType, _GateSpec] = {
+    **{
+        optype: _GateSpec(_add_gate_method(qulacs_gate), 1, 0, 1)
+        for optype, qulacs_gate in _ONE_QUBIT_GATES.items()
+    },
+    **{
+        optype: _GateSpec(_add_gate_method(qulacs_gate), 1, 1, -1)
+        for optype, qulacs_gate in _ONE_QUBIT_ROTATIONS.items()
+    },
+    **{
+        optype: _GateSpec(_add_gate_method(qulacs_gate), 2, 0, 1)
+        for optype, qulacs_gate in _TWO_QUBIT_GATES.items()
+    },
+    **{
+        optype: _GateSpec(_add_gate_method(qulacs_gate), 1, _IBM_N_PARAMS[optype], 1)
+        for optype, qulacs_gate in _IBM_GATES.items()
+    },
+}
+
+_ONE_QUBIT_MATRICES: Dict[OpType, np.ndarray] = {
+    optype: qulacs_gate(0).get_matrix()
+    for optype, qulacs_gate in _ONE_QUBIT_GATES.items()
+}
+
+_PARAMETRIC_ROTATIONS: Dict[OpType, Callable[..., None]] = {
+    OpType.Rx: ParametricQuantumCircuit.add_parametric_RX_gate,
+    OpType.Ry: ParametricQuantumCircuit.add_parametric_RY_gate,
+    OpType.Rz: ParametricQuantumCircuit.add_parametric_RZ_gate,
+}
+
+_SUPPORTED = _DISPATCH.keys() | {OpType.Measure, OpType.Barrier}
+
+_SUPPORTED_PREDICATE = GateSetPredicate(_SUPPORTED)
+
+
+@lru_cache(maxsize=64)
+def _tables_for_layout(
+    layout: Tuple[Tuple[str, int], ...], reverse_index: bool
+) -> Dict[str, List[int]]:
+    """Index tables for dense registers given as sorted (name, size) pairs.
+
+    The result is shared between calls and must not be modified.
+    """
+    sizes = [size for _, size in layout]
+    indices = np.arange(sum(sizes), dtype=np.int32)
+    if reverse_index:
+        indices = indices[::-1]
+    chunks = np.split(indices, np.cumsum(sizes, dtype=np.int64)[:-1])
+    # Plain ints are cheaper to index and to pass to Qulacs than numpy scalars.
+    return {name: chunk.tolist() for (name, _), chunk in zip(layout, chunks)}
+
+
+def _get_qubit_index_tables(
+    circuit: Circuit, reverse_index: bool = False
+) -> Optional[Dict[str, List[int]]]:
+    """Map each quantum register name to the Qulacs indices of its qubits.
+
+    Registers are laid out contiguously in sorted order, matching the order
+    of the circuit's qubits. Returns None if some register is not a dense
+    one-dimensional register, in which case the qubits must be renamed first.
+    """
+    layout = tuple((reg.name, reg.size) for reg in circuit.q_registers)
+    if sum(size for _, size in layout) != circuit.n_qubits:
+        return None
+    return _tables_for_layout(layout, reverse_index)
+
+
+def _collect_gates(
+    circuit: Circuit, tables: Dict[str, List[int]]
+) -> List[Tuple[OpType, List[float]]]:
+    """List the gates of a circuit with their Qulacs arguments.
+
+    The arguments of each gate are its Qulacs qubit indices followed by its
+    parameters, scaled and signed for Qulacs. Measures and barriers are
+    dropped; any other op without a Qulacs gate raises NotImplementedError.
+    """
+    # Collect the gates first so that all parameters can be scaled by a single
+    # vectorised multiplication, then append them to the arguments.
+    gates = []
+    params: List[float] = []
+    signs: List[int] = []
+    for com in circuit:
+        op = com.op
+        optype = op.type
+        spec = _DISPATCH.get(optype)
+        if spec is None:
+            # GateSetPredicate looks inside Conditional ops, so they get here
+            match optype:
+                case OpType.Measure | OpType.Barrier:
+                    continue
+                case _:
+                    raise _not_implemented([optype])
+        n_params = spec.n_params
+        args: List[float]
+        if spec.n_qubits == 2:
+            qb1, qb2 = com.qubits
+            args = [
+                tables[qb1.reg_name][qb1.index[0]],
+                tables[qb2.reg_name][qb2.index[0]],
+            ]
+        else:
+            qb = com.qubits[0]
+            args = [tables[qb.reg_name][qb.index[0]]]
+        if n_params:
+            params.extend(op.params)
+            signs.extend([spec.sign] * n_params)
+        gates.append((optype, args, n_params))
+
+    scaled = iter((np.array(params, dtype=float) * np.array(signs) * math.pi).tolist())
+    for _, args, n_params in gates:
+        if n_params:
+            args.extend(islice(scaled, n_params))
+    return [(optype, args) for optype, args, _ in gates]
+
+
+def _gate_matrix(optype: OpType, params: List[float]) -> np.ndarray:
+    """Matrix of a single-qubit gate, with parameters already scaled for Qulacs."""
+    if optype in _ONE_QUBIT_MATRICES:
+        return _ONE_QUBIT_MATRICES[optype]
+    qulacs_gate = _ONE_QUBIT_ROTATIONS.get(optype) or _IBM_GATES[optype]
+    return qulacs_gate(0, *params).get_matrix()  # type: ignore
+
+
+def _add_fused_gates(
+    qulacs_circ: QuantumCircuit, gates: List[Tuple[OpType, List[float]]]
+) -> None:
+    """Add gates to a circuit, merging each run of two or more single-qubit
+    gates on the same qubit into one dense matrix gate.
+    """
+    # qubit -> single-qubit gates on it not yet added to the circuit
+    pending: Dict[int, List[Tuple[OpType, List[float]]]] = {}
+
+    def flush(qubit: int) -> None:
+        run = pending.pop(qubit, None)
+        if not run:
+            return
+        if len(run) == 1:
+            optype, params = run[0]
+            _DISPATCH[optype].add_gate(qulacs_circ, qubit, *params)
+            return
+        matrix = _gate_matrix(*run[0])
+        for optype, params in run[1:]:
+            matrix = _gate_matrix(optype, params) @ matrix
+        qulacs_circ.add_dense_matrix_gate(qubit, matrix)
+
+    for optype, args in gates:
+        if _DISPATCH[optype].n_qubits == 1:
+            qubit = int(args[0])
+            pending.setdefault(qubit, []).append((optype, args[1:]))
+        else:
+            q0, q1 = (int(arg) for arg in args)
+            flush(q0)
+            flush(q1)
+            _DISPATCH[optype].add_gate(qulacs_circ, q0, q1)
+    for qubit in list(pending):
+        flush(qubit)
+
+
+def _not_implemented(optypes: Iterable[OpType]) -> NotImplementedError:
+    return NotImplementedError(
+        "Gate: {} Not Implemented in Qulacs!".format(
+            ", ".join(sorted(str(optype) for optype in optypes))
+        )
+    )
+
+
+def _check_supported(circuit: Circuit) -> None:
+    if not _SUPPORTED_PREDICATE.verify(circuit):
+        raise _not_implemented({com.op.type for com in circuit} - _SUPPORTED)
+
+
+def _prepare_circuit(
+    circuit: Circuit, reverse_index: bool, replace_swaps: bool
+) -> Tuple[Circuit, Dict[str, List[int]]]:
+    """Return a circuit ready for conversion together with its qubit index tables.
+
+    The input is only copied if it has to be modified.
+    """
+    circ = circuit
+    if replace_swaps:
+        circ = circuit.copy()
+        circ.replace_implicit_wire_swaps()
+
+    tables = _get_qubit_index_tables(circ, reverse_index)
+    if tables is None:
+        # Rename the qubits, in sorted order, into one dense default register.
+        # FlattenRegisters is not enough, as it leaves a sparse default
+        # register unchanged.
+        if circ is circuit:
+            circ = circuit.copy()
+        circ.rename_units({qb: Qubit(i) for i, qb in enumerate(circ.qubits)})
+        tables = _tables_for_layout((("q", circ.n_qubits),), reverse_index)
+    return circ, tables
+
+
 def tk_to_qulacs(
-    circuit: Circuit, reverse_index: bool = False, replace_implicit_swaps: bool = False
+    circuit: Circuit,
+    reverse_index: bool = False,
+    replace_implicit_swaps: bool = False,
+    fuse_single_qubit_gates: bool = False,
 ) -> QuantumCircuit:
-    """Convert a pytket circuit to a qulacs circuit object."""
-    circ = circuit.copy()
+    """Convert a pytket circuit to a qulacs circuit object.
 
-    if not circ.is_simple:
-        FlattenRegisters().apply(circ)
+    :param circuit: Circuit to convert
+    :param reverse_index: Whether to reverse the order of the qubit indices
+    :param replace_implicit_swaps: Whether to replace implicit wire swaps in the
+        circuit with explicit SWAP gates
+    :param fuse_single_qubit_gates: Whether to merge each run of two or more
+        single-qubit gates acting on the same qubit into a single dense matrix
+        gate, so that simulation makes fewer passes over the state. Defaults to
+        False
+    """
+    replace_swaps = replace_implicit_swaps and circuit.has_implicit_wireswaps
+    if circuit.n_gates == 0 and not replace_swaps:
+        # no commands at all, so nothing to validate
+        return QuantumCircuit(circuit.n_qubits)
 
-    if replace_implicit_swaps:
-        circ.replace_implicit_wire_swaps()
-    n_qubits = circ.n_qubits
+    _check_supported(circuit)
+    circ, tables = _prepare_circuit(circuit, reverse_index, replace_swaps)
     qulacs_circ = QuantumCircuit(circ.n_qubits)
-    index_map = {
-        i: (i if not reverse_index else n_qubits - 1 - i) for i in range(n_qubits)
-    }
-    for com in circ:
-        optype = com.op.type
-        if optype in _IBM_GATES:
-            qulacs_gate = _IBM_GATES[optype]
-            index = index_map[com.qubits[0].index[0]]
-
-            if optype == OpType.U1:
-                param = com.op.params[0]
-                add_gate = qulacs_gate(index, param * np.pi)  # type: ignore
-            elif optype == OpType.U2:
-                param0, param1 = com.op.params
-                add_gate = qulacs_gate(index, param0 * np.pi, param1 * np.pi)  # type: ignore
-            elif optype == OpType.U3:
-                param0, param1, param2 = com.op.params
-                add_gate = qulacs_gate(  # type: ignore
-                    index, param0 * np.pi, param1 * np.pi, param2 * np.pi
-                )
-
-        elif optype in _ONE_QUBIT_GATES:
-            qulacs_gate = _ONE_QUBIT_GATES[optype]
-            index = index_map[com.qubits[0].index[0]]
-            add_gate = qulacs_gate(index)
-
-        elif optype in _ONE_QUBIT_ROTATIONS:
-            qulacs_gate = _ONE_QUBIT_ROTATIONS[optype]
-            index = index_map[com.qubits[0].index[0]]
-            param = com.op.params[0] * np.pi
-            add_gate = qulacs_gate(index, -param)  # parameter negated for qulacs
-
-        elif optype in _TWO_QUBIT_GATES:
-            qulacs_gate = _TWO_QUBIT_GATES[optype]
-            id1 = index_map[com.qubits[0].index[0]]
-            id2 = index_map[com.qubits[1].index[0]]
-            add_gate = qulacs_gate(id1, id2)
-
-        elif optype in _MEASURE_GATES:
-            continue
-            # gate = _MEASURE_GATES[optype]
-            # qubit = com.qubits[0].index[0]
-            # bit = com.bits[0].index[0]
-            # add_gate = (gate(qubit, bit))
+    gates = _collect_gates(circ, tables)
+    if fuse_single_qubit_gates:
+        _add_fused_gates(qulacs_circ, gates)
+        return qulacs_circ
+    for optype, args in gates:
+        _DISPATCH[optype].add_gate(qulacs_circ, *args)
 
-        elif optype == OpType.Barrier:
-            continue
+    return qulacs_circ
 
-        else:
-            raise NotImplementedError(
-                "Gate: {} Not Implemented in Qulacs!".format(optype)
+
+def tk_to_qulacs_parametric(
+    circuit: Circuit, reverse_index: bool = False, replace_implicit_swaps: bool = False
+) -> Tuple[ParametricQuantumCircuit, Dict[Symbol, List[Tuple[int, float]]]]:
+    """Convert a symbolic pytket circuit to a qulacs parametric circuit.
+
+    Each Rx, Ry or Rz gate whose angle is a symbol, or a constant multiple of a
+    symbol, becomes a parametric Qulacs rotation, so that the circuit can be
+    re-evaluated for new symbol values without converting it again. All other
+    gates must have numeric parameters.
+
+    The returned map sends each symbol to the (parameter index, coefficient)
+    pairs of the parametric gates depending on it. Parameters are initialised
+    to zero; to evaluate the circuit at ``values``, set them with
+
+    .. code-block:: python
+
+        for symbol, entries in param_map.items():
+            for index, coeff in entries:
+                qulacs_circ.set_parameter(index, coeff * values[symbol])
+
+    :param circuit: Circuit to convert
+    :param reverse_index: Whether to reverse the order of the qubit indices
+    :param replace_implicit_swaps: Whether to replace implicit wire swaps in the
+        circuit with explicit SWAP gates
+    :return: The Qulacs circuit and the map from symbols to its parameters
+    """
+    _check_supported(circuit)
+    replace_swaps = replace_implicit_swaps and circuit.has_implicit_wireswaps
+    circ, tables = _prepare_circuit(circuit, reverse_index, replace_swaps)
+    qulacs_circ = ParametricQuantumCircuit(circ.n_qubits)
+    param_map: Dict[Symbol, List[Tuple[int, float]]] = {}
+    pi = math.pi
+    for com in circ:
+        op = com.op
+        optype = op.type
+        spec = _DISPATCH.get(optype)
+        if spec is None:
+            match optype:
+                case OpType.Measure | OpType.Barrier:
+                    continue
+                case _:
+                    raise _not_implemented([optype])
+        indices = [tables[qb.reg_name][qb.index[0]] for qb in com.qubits]
+        params = op.params
+        if not any(isinstance(param, Expr) and param.free_symbols for param in params):
+            scale = spec.sign * pi
+            spec.add_gate(
+                qulacs_circ, *indices, *(float(param) * scale for param in params)
             )
-        qulacs_circ.add_gate(add_gate)
+            continue
+        if optype not in _PARAMETRIC_ROTATIONS:
+            raise ValueError(
+                "Symbolic parameters are only supported on Rx, Ry and Rz gates, "
+                "not {}".format(optype)
+            )
+        angle = cast(Expr, params[0])
+        coeff, symbol = angle.as_coeff_Mul()
+        if not isinstance(symbol, Symbol):
+            raise ValueError(
+                "Symbolic angle {} is not a multiple of a symbol".format(angle)
+            )
+        param_map.setdefault(symbol, []).append(
+            (qulacs_circ.get_parameter_count(), float(coeff) * spec.sign * pi)
+        )
+        _PARAMETRIC_ROTATIONS[optype](qulacs_circ, indices[0], 0.0)
 
-    return qulacs_circ
+    return qulacs_circ, param_map
@@ -20,13 +20,15 @@ from datetime import timedelta
 from hypothesis import given, strategies, settings
 import numpy as np
 import pytest
+from qulacs import QuantumCircuit
 from pytket.backends import ResultHandle
 from pytket.circuit import Circuit, BasisOrder, OpType, Qubit
 from pytket.pauli import Pauli, QubitPauliString
 from pytket.passes import CliffordSimp
 from pytket.utils.operators import QubitPauliOperator
 from pytket.utils.results import KwargTypes
-from pytket.extensions.qulacs import QulacsBackend
+from pytket.extensions.qulacs import QulacsBackend, tk_to_qulacs
+from pytket.extensions.qulacs.backends import qulacs_backend
 
 
 def make_seeded_QulacsBackend(base: type[QulacsBackend]) -> type:
@@ -376,3 +378,47 @@ def test_shots_bits_edgecases(n_shots, n_bits) -> None:
         assert np.array_equal(res.get_shots(), correct_shots)
         assert res.get_shots().shape == correct_shape
         assert res.get_counts() == correct_counts
+
+
+def test_repeated_circuit_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    n_calls = 0
+
+    def counting_tk_to_qulacs(*args: Any, **kwargs: Any) -> QuantumCircuit:
+        nonlocal n_calls
+        n_calls += 1
+        return tk_to_qulacs(*args, **kwargs)
+
+    monkeypatch.setattr(qulacs_backend, "tk_to_qulacs", counting_tk_to_qulacs)
+    c = Circuit(2, 2).H(0).CX(0, 1).measure_all()
+    for b in backends:
+        c = b.get_compiled_circuit(c)
+        n_calls = 0
+        handles = b.process_circuits([c, c, c], n_shots=10)
+        assert n_calls == 1
+        for h in handles:
+            counts = b.get_result(h).get_counts()
+            assert sum(counts.values()) == 10
+            assert set(counts) <= {(0, 0), (1, 1)}
+
+
+def test_measure_without_gates() -> None:
+    c = Circuit(3, 2).Measure(0, 1).Measure(2, 0)
+    for b in backends:
+        res = b.run_circuit(c, n_shots=5)
+        assert res.get_shots().shape == (5, 2)
+        assert res.get_counts() == {(0, 0): 5}
+
+
+def test_measure_without_gates_seeded() -> None:
+    # A measured circuit without gates must not shift the random stream of a
+    # seeded batch.
+    c_empty = Circuit(1, 1).Measure(0, 0)
+    c_identity = Circuit(1, 1).X(0).X(0).Measure(0, 0)
+    c_random = Circuit(4).H(0).H(1).H(2).H(3).measure_all()
+    for b in backends:
+        h_empty = b.process_circuits([c_empty, c_random], n_shots=20, seed=7)
+        h_identity = b.process_circuits([c_identity, c_random], n_shots=20, seed=7)
+        assert np.array_equal(
+            b.get_result(h_empty[1]).get_shots(),
+            b.get_result(h_identity[1]).get_shots(),
+        )
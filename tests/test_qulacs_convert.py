@@ -15,10 +15,12 @@
 import warnings
 
 import numpy as np
+import pytest
+from sympy import Symbol
 from qulacs import QuantumCircuit, QuantumState
 from qulacs.state import inner_product
-from pytket.circuit import Circuit, OpType
-from pytket.extensions.qulacs import tk_to_qulacs
+from pytket.circuit import Circuit, OpType, Qubit
+from pytket.extensions.qulacs import tk_to_qulacs, tk_to_qulacs_parametric
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.warn("this will not show", DeprecationWarning)
@@ -94,3 +96,109 @@ def test_rotations() -> None:
     v = state.get_vector()
     assert np.isclose(v[0], np.sqrt(0.5))
     assert np.isclose(v[1], -1j * np.sqrt(0.5))
+
+
+def test_registers() -> None:
+    circ = Circuit()
+    b = circ.add_q_register("b", 2)
+    a = circ.add_q_register("a", 3)
+    circ.X(a[2]).H(b[0]).CX(b[0], b[1])
+    flat = Circuit(5).X(2).H(3).CX(3, 4)
+    for reverse_index in [False, True]:
+        state = QuantumState(5)
+        tk_to_qulacs(circ, reverse_index=reverse_index).update_quantum_state(state)
+        state0 = QuantumState(5)
+        tk_to_qulacs(flat, reverse_index=reverse_index).update_quantum_state(state0)
+        assert np.isclose(abs(inner_product(state0, state)), 1)
+
+
+def test_input_not_modified() -> None:
+    circ = Circuit(3).X(0).SWAP(0, 1).H(2)
+    circ.replace_SWAPs()
+    circ.add_qubit(Qubit("a", 0))
+    circ.X(Qubit("a", 0))
+    commands = circ.get_commands()
+    permutation = circ.implicit_qubit_permutation()
+    tk_to_qulacs(circ, replace_implicit_swaps=True)
+    assert circ.get_commands() == commands
+    assert circ.implicit_qubit_permutation() == permutation
+
+
+def test_unsupported_gate() -> None:
+    circ = Circuit(3, 1).H(0).CCX(0, 1, 2).Measure(0, 0)
+    with pytest.raises(NotImplementedError, match="CCX"):
+        tk_to_qulacs(circ)
+
+
+def test_fuse_single_qubit_gates() -> None:
+    circ = Circuit(3).X(0).Rx(0.3, 0).H(1).CX(0, 1).U3(0.1, 0.2, 0.3, 1).T(1).S(2)
+    circ.Rz(0.7, 0).U2(0.4, 0.5, 0).U1(0.6, 0).CZ(1, 2).Y(2)
+    qulacs_circ = tk_to_qulacs(circ)
+    fused_circ = tk_to_qulacs(circ, fuse_single_qubit_gates=True)
+    assert fused_circ.get_gate_count() < qulacs_circ.get_gate_count()
+    state = QuantumState(3)
+    qulacs_circ.update_quantum_state(state)
+    fused_state = QuantumState(3)
+    fused_circ.update_quantum_state(fused_state)
+    assert np.allclose(state.get_vector(), fused_state.get_vector())
+
+
+def test_empty_circuit() -> None:
+    assert tk_to_qulacs(Circuit(3, 3)).get_gate_count() == 0
+    circ = Circuit(2).SWAP(0, 1)
+    circ.replace_SWAPs()
+    assert circ.n_gates == 0
+    assert tk_to_qulacs(circ).get_gate_count() == 0
+    assert tk_to_qulacs(circ, replace_implicit_swaps=True).get_gate_count() == 1
+
+
+def test_parametric() -> None:
+    a, b = Symbol("a"), Symbol("b")
+    circ = Circuit(2).H(0).Rx(a, 0).CX(0, 1).Rz(2 * b, 1).Ry(a, 1).U1(0.3, 0)
+    qulacs_circ, param_map = tk_to_qulacs_parametric(circ)
+    assert {s: [i for i, _ in entries] for s, entries in param_map.items()} == {
+        a: [0, 2],
+        b: [1],
+    }
+    for values in [{a: 0.1, b: 0.2}, {a: -0.7, b: 1.3}]:
+        for symbol, entries in param_map.items():
+            for index, coeff in entries:
+                qulacs_circ.set_parameter(index, coeff * values[symbol])
+        state = QuantumState(2)
+        qulacs_circ.update_quantum_state(state)
+        numeric = circ.copy()
+        numeric.symbol_substitution(values)
+        state0 = QuantumState(2)
+        tk_to_qulacs(numeric).update_quantum_state(state0)
+        assert np.allclose(state.get_vector(), state0.get_vector())
+    with pytest.raises(ValueError):
+        tk_to_qulacs_parametric(Circuit(1).U1(a, 0))
+    with pytest.raises(ValueError):
+        tk_to_qulacs_parametric(Circuit(1).Rx(a + 0.5, 0))
+
+
+def test_conditional_gate() -> None:
+    circ = Circuit(2, 1).H(0).Measure(0, 0)
+    circ.X(1, condition_bits=[0], condition_value=1)
+    with pytest.raises(NotImplementedError, match="Conditional"):
+        tk_to_qulacs(circ)
+    circ = Circuit(2, 1).H(0).Measure(0, 0)
+    circ.Rx(Symbol("a"), 1, condition_bits=[0], condition_value=1)
+    with pytest.raises(NotImplementedError, match="Conditional"):
+        tk_to_qulacs_parametric(circ)
+
+
+def test_sparse_register() -> None:
+    circ = Circuit()
+    circ.add_qubit(Qubit(0))
+    circ.add_qubit(Qubit(2))
+    circ.X(Qubit(2)).CX(Qubit(2), Qubit(0))
+    qubits = circ.qubits
+    for reverse_index in [False, True]:
+        state = QuantumState(2)
+        tk_to_qulacs(circ, reverse_index=reverse_index).update_quantum_state(state)
+        state0 = QuantumState(2)
+        flat = Circuit(2).X(1).CX(1, 0)
+        tk_to_qulacs(flat, reverse_index=reverse_index).update_quantum_state(state0)
+        assert np.isclose(abs(inner_product(state0, state)), 1)
+    assert circ.qubits == qubits